@@ -1,11 +1,13 @@
 import os
 import logging
-import uuid
 import speech_recognition as sr
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from pydub import AudioSegment
+from werkzeug.exceptions import RequestEntityTooLarge
 from dotenv import load_dotenv
+from waitress import serve
+
+from audio import load_audio, trim_silence
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,9 +21,17 @@ app = Flask(__name__)
 # Enable CORS so any frontend can call this API
 CORS(app, resources={r"/*": {"origins": "*"}})
 
-# Directory for temporary audio storage
-TEMP_DIR = "/tmp" if os.path.exists("/tmp") else "temp_audio"
-os.makedirs(TEMP_DIR, exist_ok=True)
+# Reject oversized uploads before Werkzeug buffers the body
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # 10 MB
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
+
+# Shared recognizer, created once per process instead of per request
+recognizer = sr.Recognizer()
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    """JSON body for uploads over MAX_UPLOAD_BYTES."""
+    return jsonify({"error": f"File too large (max {MAX_UPLOAD_BYTES} bytes)"}), 413
 
 @app.route('/', methods=['GET'])
 def health_check():
@@ -39,9 +49,6 @@ def transcribe_audio():
     Input: Multipart form-data with 'file'.
     Output: JSON { "text": "transcribed text" }
     """
-    temp_filename = None
-    wav_filename = None
-    
     try:
         # Validate request
         if 'file' not in request.files:
@@ -51,42 +58,28 @@ def transcribe_audio():
         if file.filename == '':
             return jsonify({"error": "No file selected"}), 400
 
-        # Generate unique filenames
-        unique_id = str(uuid.uuid4())
-        # Try to guess extension or default to .webm (common from browsers)
-        ext = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else 'webm'
-        
-        temp_filename = os.path.join(TEMP_DIR, f"{unique_id}.{ext}")
-        wav_filename = os.path.join(TEMP_DIR, f"{unique_id}.wav")
-        
-        # Save uploaded file
-        file.save(temp_filename)
-        
-        # Convert to WAV (Required for SpeechRecognition)
+        # Decode to PCM (Required for SpeechRecognition)
         try:
-            # Pydub handles various formats (webm, mp3, etc) given ffmpeg is installed
-            sound = AudioSegment.from_file(temp_filename)
-            sound.export(wav_filename, format="wav")
+            # PCM WAV is read directly; PyAV handles the rest (webm, mp3, etc)
+            # Reads Werkzeug's buffered upload stream directly, no extra copy
+            audio_data = load_audio(file.stream)
         except Exception as e:
             logger.error(f"Audio conversion failed: {e}")
             return jsonify({
                 "error": "Failed to process audio format.",
-                "details": "Ensure ffmpeg is installed on the server."
+                "details": "Unsupported or corrupt audio file."
             }), 500
             
         # Perform Speech Recognition
-        recognizer = sr.Recognizer()
-        
         try:
-            with sr.AudioFile(wav_filename) as source:
-                # Read the audio file
-                audio_data = recognizer.record(source)
-                
-                # Use Google Web Speech API (Free, no key required for low volume)
-                text = recognizer.recognize_google(audio_data)
-                
-                logger.info(f"Transcription successful: '{text}'")
-                return jsonify({"text": text})
+            # Drop leading/trailing silence; silent clips raise UnknownValueError
+            audio_data = trim_silence(audio_data)
+
+            # Use Google Web Speech API (Free, no key required for low volume)
+            text = recognizer.recognize_google(audio_data)
+            
+            logger.info(f"Transcription successful: '{text}'")
+            return jsonify({"text": text})
                 
         except sr.UnknownValueError:
             # Audio was not understood
@@ -97,24 +90,14 @@ def transcribe_audio():
             logger.error(f"Google Speech API error: {e}")
             return jsonify({"error": "Speech recognition service unavailable"}), 503
 
+    except RequestEntityTooLarge:
+        # Handled by upload_too_large()
+        raise
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         return jsonify({"error": "Internal server error"}), 500
-        
-    finally:
-        # Cleanup temporary files
-        if temp_filename and os.path.exists(temp_filename):
-            try:
-                os.remove(temp_filename)
-            except:
-                pass
-        if wav_filename and os.path.exists(wav_filename):
-            try:
-                os.remove(wav_filename)
-            except:
-                pass
 
 if __name__ == '__main__':
-    # Run locally
+    # Production WSGI server (multi-threaded, no Werkzeug dev server)
     port = int(os.environ.get("PORT", 5000))
-    app.run(host='0.0.0.0', port=port)
+    serve(app, host='0.0.0.0', port=port, threads=8)
@@ -0,0 +1,128 @@
+"""Upload decoding shared by the FastAPI (main.py) and Flask (app.py) entrypoints."""
+
+import audioop
+import os
+import struct
+from typing import BinaryIO
+
+import av
+import speech_recognition as sr
+
+# ---------------- FORMAT ----------------
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # 16-bit PCM
+WAVE_FORMAT_PCM = 1  # integer PCM; float and WAVE_FORMAT_EXTENSIBLE go to libav
+
+# Only used to read WAV frames; holds no per-request state
+reader = sr.Recognizer()
+
+
+# ---------------- DECODE ----------------
+def decode_to_pcm(f: BinaryIO) -> bytes:
+    """Decode any libav-readable upload to raw 16kHz mono s16le PCM, in-process."""
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+    pcm = bytearray()
+
+    with av.open(f, mode="r") as container:
+        for frame in container.decode(audio=0):
+            for out in resampler.resample(frame):
+                pcm += memoryview(out.planes[0])[:out.samples * SAMPLE_WIDTH]
+
+    # Flush samples still buffered inside the resampler
+    for out in resampler.resample(None):
+        pcm += memoryview(out.planes[0])[:out.samples * SAMPLE_WIDTH]
+
+    return bytes(pcm)
+
+
+def find_chunk(f: BinaryIO, chunk_id: bytes, max_chunks: int = 16):
+    """Return the first bytes of a RIFF chunk body, or None if not found early."""
+    for _ in range(max_chunks):
+        head = f.read(8)
+        if len(head) < 8:
+            return None
+        found_id, size = struct.unpack("<4sI", head)
+        if found_id == chunk_id:
+            return f.read(min(size, 64))
+        f.seek(size + (size & 1), 1)  # chunk bodies are word-aligned
+    return None
+
+
+def is_pcm_container(f: BinaryIO) -> bool:
+    """Integer-PCM WAV with 1-2 channels, the only input sr.AudioFile reads cleanly.
+
+    For anything else it shells out to flac (or raises OSError where no flac
+    binary ships), or asserts on more than two channels. That includes AIFF
+    passed as a file object, since it doesn't rewind after trying wave.
+    """
+    try:
+        header = f.read(12)
+        if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            return False
+        fmt = find_chunk(f, b"fmt ")
+        if fmt is None or len(fmt) < 4:
+            return False
+        format_tag, channels = struct.unpack("<HH", fmt[:4])
+        return format_tag == WAVE_FORMAT_PCM and channels in (1, 2)
+    finally:
+        f.seek(0)
+
+
+def load_audio(f: BinaryIO) -> sr.AudioData:
+    # Fast path: plain PCM WAV needs no codec at all
+    if is_pcm_container(f):
+        try:
+            with sr.AudioFile(f) as source:
+                return reader.record(source)
+        except (ValueError, OSError, AssertionError):
+            f.seek(0)  # header looked fine but the body didn't, let libav try
+
+    return sr.AudioData(decode_to_pcm(f), SAMPLE_RATE, SAMPLE_WIDTH)
+
+
+# ---------------- SILENCE TRIM ----------------
+# Thresholds are RMS on 16-bit samples (sr.Recognizer.energy_threshold's scale)
+# and can be tuned per deployment.
+FRAME_MS = 30
+# Leading/trailing frames quieter than this are trimmed (~-41 dBFS)
+SILENCE_RMS = int(os.environ.get("STT_SILENCE_RMS", "300"))
+# Clips with no frame above this are treated as silence and never sent (~-70 dBFS)
+SILENT_CLIP_RMS = int(os.environ.get("STT_SILENT_CLIP_RMS", "10"))
+SPEECH_PAD_MS = 200
+MIN_VOICED_FRAMES = 3  # fewer than this is a click/pop, not speech
+
+
+def trim_silence(audio: sr.AudioData) -> sr.AudioData:
+    """Cut leading/trailing silence so less audio is sent to Google.
+
+    Levels are measured on 16-bit signed samples whatever the upload's width
+    (8-bit WAV is unsigned, 32-bit values are 65536x larger), so one threshold
+    fits every width.
+    Raises sr.UnknownValueError only for clips that are effectively silent
+    (below SILENT_CLIP_RMS), so they never reach the Google API. Quiet clips
+    that never reach SILENCE_RMS are returned untrimmed.
+    """
+    width = audio.sample_width
+    frame_samples = audio.sample_rate * FRAME_MS // 1000
+    frame_bytes = frame_samples * 2
+
+    # No copy for 16-bit input; others are debiased/rescaled once
+    pcm16 = memoryview(audio.get_raw_data(convert_width=2))
+    levels = [
+        audioop.rms(pcm16[i:i + frame_bytes], 2)
+        for i in range(0, len(pcm16), frame_bytes)
+    ]
+    if sum(level >= SILENT_CLIP_RMS for level in levels) < MIN_VOICED_FRAMES:
+        raise sr.UnknownValueError()
+
+    voiced = [n for n, level in enumerate(levels) if level >= SILENCE_RMS]
+    if not voiced:
+        return audio
+
+    pcm = memoryview(audio.frame_data)
+    pad = audio.sample_rate * SPEECH_PAD_MS // 1000
+    start = max(0, voiced[0] * frame_samples - pad) * width
+    end = min(len(pcm), ((voiced[-1] + 1) * frame_samples + pad) * width)
+    if start == 0 and end == len(pcm):
+        return audio
+    return sr.AudioData(pcm[start:end].tobytes(), audio.sample_rate, width)
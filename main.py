@@ -1,25 +1,87 @@
-import uuid
+import asyncio
 import os
-import shutil
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import BinaryIO
 
 from fastapi import FastAPI, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
 import speech_recognition as sr
-from pydub import AudioSegment
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import uvicorn
-import static_ffmpeg
+
+from audio import load_audio, trim_silence
 
 # ---------------- LOGGING ----------------
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("stt-api")
 
-# ---------------- FFMPEG ----------------
-static_ffmpeg.add_paths()
-
 # ---------------- APP ----------------
 app = FastAPI(title="Simple STT API (SpeechRecognition)")
 
+# ---------------- LIMITS ----------------
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # 10 MB
+
+
+def upload_too_large() -> JSONResponse:
+    return JSONResponse(
+        status_code=413,
+        content={"text": "", "error": f"File too large (max {MAX_UPLOAD_BYTES} bytes)"},
+    )
+
+
+class LimitUploadSize:
+    """413 any request whose body exceeds MAX_UPLOAD_BYTES.
+
+    Plain ASGI rather than @app.middleware("http") so it can wrap `receive`:
+    chunked uploads carry no Content-Length, so the body is counted as it
+    streams in and cut off before the rest is spooled.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Reject from the header, before any of the body is read
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
+            await upload_too_large()(scope, receive, send)
+            return
+
+        received = 0
+        rejected = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > MAX_UPLOAD_BYTES:
+                    rejected = True
+                    await upload_too_large()(scope, receive, send)
+                    # Looks like a disconnect to the app, so the handler never runs
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def limited_send(message: Message) -> None:
+            # The 413 is already out; drop whatever the app answers with
+            if not rejected:
+                await send(message)
+
+        await self.app(scope, limited_receive, limited_send)
+
+
+# Registered before CORS so the 413 still carries CORS headers
+app.add_middleware(LimitUploadSize)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -28,15 +90,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ---------------- TEMP DIR ----------------
-TEMP_DIR = "temp_audio"
-os.makedirs(TEMP_DIR, exist_ok=True)
+# ---------------- AUDIO ----------------
+def prepare_audio(f: BinaryIO) -> sr.AudioData:
+    return trim_silence(load_audio(f))
 
 # ---------------- RECOGNIZER ----------------
 recognizer = sr.Recognizer()
 
+# ---------------- CONCURRENCY ----------------
+# Worker processes; the uvicorn CLI reads WEB_CONCURRENCY for --workers too
+WORKERS = max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+
+# Decoding is CPU-bound: a dedicated pool with one thread per core (split
+# across workers) so concurrent uploads don't fight over cores. The Google
+# call is network-bound and stays on the default executor.
+DECODE_POOL = ThreadPoolExecutor(
+    max_workers=max(1, (os.cpu_count() or 1) // WORKERS),
+    thread_name_prefix="decode",
+)
+
+# ---------------- SCHEMAS ----------------
+# Declared response models let FastAPI serialize straight to JSON bytes
+# through Pydantic instead of jsonable_encoder + json.dumps
+
+
+class HealthResponse(BaseModel):
+    status: str
+    engine: str
+    provider: str
+
+
+class STTResponse(BaseModel):
+    text: str
+    error: str | None = None
+
 # ---------------- ROUTES ----------------
-@app.get("/")
+@app.get("/", response_model=HealthResponse)
 def home():
     return {
         "status": "online",
@@ -44,27 +133,21 @@ def home():
         "provider": "google"
     }
 
-@app.post("/stt")
+@app.post("/stt", response_model=STTResponse, response_model_exclude_none=True)
 async def stt(file: UploadFile = File(...)):
-    file_id = str(uuid.uuid4())
-    original_path = os.path.join(TEMP_DIR, f"{file_id}_{file.filename}")
-    wav_path = os.path.join(TEMP_DIR, f"{file_id}.wav")
-
     try:
-        # 1️⃣ Save uploaded file
-        with open(original_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
-
-        # 2️⃣ Convert to WAV (16kHz mono)
-        audio = AudioSegment.from_file(original_path)
-        audio = audio.set_channels(1).set_frame_rate(16000)
-        audio.export(wav_path, format="wav")
+        # Decoding and the Google call both block, keep them off the event loop
+        loop = asyncio.get_running_loop()
 
-        # 3️⃣ Speech Recognition
-        with sr.AudioFile(wav_path) as source:
-            audio_data = recognizer.record(source)
+        # 1️⃣ Decode to PCM (PCM WAV directly, anything else via PyAV)
+        #    and trim leading/trailing silence. Reads straight from Starlette's
+        #    spooled upload, no extra in-memory copy of the body.
+        audio_data = await loop.run_in_executor(DECODE_POOL, prepare_audio, file.file)
 
-        text = recognizer.recognize_google(audio_data, language="en-IN")
+        # 2️⃣ Speech Recognition
+        text = await loop.run_in_executor(
+            None, partial(recognizer.recognize_google, audio_data, language="en-IN")
+        )
 
         logger.info(f"Transcribed: {text}")
         return {"text": text}
@@ -79,12 +162,14 @@ async def stt(file: UploadFile = File(...)):
         logger.error(f"STT error: {e}")
         return {"text": "", "error": str(e)}
 
-    finally:
-        for p in (original_path, wav_path):
-            if os.path.exists(p):
-                os.remove(p)
-
 # ---------------- RUN ----------------
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        workers=WORKERS,
+    )
@@ -0,0 +1,94 @@
+import io
+import wave
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as flask_app
+import main
+
+RATE = 16000
+
+
+def silent_wav(seconds=1.0):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(b"\x00\x00" * int(seconds * RATE))
+    buf.seek(0)
+    return buf
+
+
+@pytest.fixture
+def no_google(monkeypatch):
+    def recognize_google(*args, **kwargs):
+        pytest.fail("silent upload was sent to Google")
+
+    monkeypatch.setattr(main.recognizer, "recognize_google", recognize_google)
+    monkeypatch.setattr(flask_app.recognizer, "recognize_google", recognize_google)
+
+
+def test_fastapi_silent_upload_skips_google(no_google):
+    client = TestClient(main.app)
+    res = client.post("/stt", files={"file": ("silence.wav", silent_wav(), "audio/wav")})
+
+    assert res.status_code == 200
+    assert res.json()["text"] == ""
+
+
+def test_flask_silent_upload_skips_google(no_google):
+    client = flask_app.app.test_client()
+    res = client.post(
+        "/transcribe",
+        data={"file": (silent_wav(), "silence.wav")},
+        content_type="multipart/form-data",
+    )
+
+    assert res.status_code == 200
+    assert res.get_json() == {"text": ""}
+
+
+@pytest.fixture
+def small_limit(monkeypatch):
+    def prepare_audio(f):
+        pytest.fail("oversized upload was decoded")
+
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 1024)
+    monkeypatch.setattr(main, "prepare_audio", prepare_audio)
+
+
+def multipart_body(payload, boundary="stt-test"):
+    return (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="big.wav"\r\n'
+        "Content-Type: audio/wav\r\n\r\n"
+    ).encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+
+
+def test_fastapi_rejects_large_content_length(small_limit):
+    client = TestClient(main.app)
+    res = client.post("/stt", files={"file": ("big.wav", b"\x00" * 4096, "audio/wav")})
+
+    assert res.status_code == 413
+    assert res.json()["text"] == ""
+
+
+def test_fastapi_rejects_large_chunked_upload(small_limit):
+    body = multipart_body(b"\x00" * 4096)
+
+    def chunks():
+        for i in range(0, len(body), 512):
+            yield body[i:i + 512]
+
+    client = TestClient(main.app)
+    res = client.post(
+        "/stt",
+        content=chunks(),
+        headers={"Content-Type": "multipart/form-data; boundary=stt-test"},
+    )
+
+    assert "content-length" not in res.request.headers
+    assert res.status_code == 413
+    assert res.json()["text"] == ""
@@ -0,0 +1,127 @@
+import audioop
+import io
+import math
+import struct
+import wave
+
+import av
+import pytest
+import speech_recognition as sr
+
+import audio
+from audio import load_audio, trim_silence
+
+RATE = 16000
+
+
+def make_wav(width, amplitude=0.5, lead_silence=0.5, tone=1.0):
+    """Mono WAV: `lead_silence` seconds of silence, then a 440 Hz tone."""
+    samples = [0] * int(lead_silence * RATE) + [
+        int(amplitude * 32767 * math.sin(2 * math.pi * 440 * i / RATE))
+        for i in range(int(tone * RATE))
+    ]
+    pcm = audioop.lin2lin(struct.pack(f"<{len(samples)}h", *samples), 2, width)
+    if width == 1:
+        pcm = audioop.bias(pcm, 1, 128)  # 8-bit WAV is unsigned
+
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(width)
+        w.setframerate(RATE)
+        w.writeframes(pcm)
+    buf.seek(0)
+    return buf
+
+
+@pytest.mark.parametrize("width", [1, 2, 4])
+def test_trim_keeps_tone_and_cuts_lead_silence(width):
+    audio = load_audio(make_wav(width))
+    trimmed = trim_silence(audio)
+
+    assert trimmed.sample_width == width
+    full = len(audio.frame_data) // width
+    kept = len(trimmed.frame_data) // width
+    assert RATE <= kept < full  # whole tone kept, most of the silence dropped
+
+
+@pytest.mark.parametrize("width", [1, 2, 4])
+def test_silent_clip_is_rejected(width):
+    audio = load_audio(make_wav(width, lead_silence=1.0, tone=0))
+    with pytest.raises(sr.UnknownValueError):
+        trim_silence(audio)
+
+
+def test_quiet_clip_is_sent_untrimmed():
+    # ~-43 dBFS tone: under the trim threshold but clearly not silence
+    audio = load_audio(make_wav(2, amplitude=0.01))
+    assert trim_silence(audio) is audio
+
+
+def tone(rate, seconds=1.0, amplitude=0.5):
+    return [amplitude * math.sin(2 * math.pi * 440 * i / rate) for i in range(int(seconds * rate))]
+
+
+def make_float_wav(rate=44100):
+    """32-bit float WAV (format tag 3), which the stdlib wave module can't read."""
+    samples = tone(rate)
+    data = struct.pack(f"<{len(samples)}f", *samples)
+    fmt = struct.pack("<HHIIHH", 3, 1, rate, rate * 4, 4, 32)
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", len(data)) + data
+    return io.BytesIO(b"RIFF" + struct.pack("<I", len(body)) + body)
+
+
+def make_multichannel_wav(channels=4, rate=44100):
+    samples = [int(s * 32767) for s in tone(rate) for _ in range(channels)]
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(struct.pack(f"<{len(samples)}h", *samples))
+    buf.seek(0)
+    return buf
+
+
+@pytest.mark.parametrize("make", [make_float_wav, make_multichannel_wav])
+def test_non_fast_path_wav_decodes_through_pyav(make, monkeypatch):
+    def no_audio_file(*args, **kwargs):
+        pytest.fail("sr.AudioFile must not be used for this WAV")
+
+    monkeypatch.setattr(audio.sr, "AudioFile", no_audio_file)
+
+    decoded = load_audio(make())
+    assert (decoded.sample_rate, decoded.sample_width) == (audio.SAMPLE_RATE, audio.SAMPLE_WIDTH)
+    assert len(decoded.frame_data) == audio.SAMPLE_RATE * audio.SAMPLE_WIDTH  # 1 s mono
+
+
+def encode_tone(container, codec, rate):
+    """1 s mono 440 Hz tone compressed with libav, as a browser upload would be."""
+    samples = [int(s * 32767) for s in tone(rate)]
+    buf = io.BytesIO()
+    with av.open(buf, "w", format=container) as out:
+        stream = out.add_stream(codec, rate=rate)
+        stream.layout = "mono"
+        for start in range(0, len(samples), 1024):  # PyAV re-frames for the codec
+            chunk = samples[start:start + 1024]
+            frame = av.AudioFrame(format="s16", layout="mono", samples=len(chunk))
+            frame.planes[0].update(struct.pack(f"<{len(chunk)}h", *chunk))
+            frame.rate = rate
+            frame.pts = start
+            out.mux(stream.encode(frame))
+        out.mux(stream.encode(None))
+    buf.seek(0)
+    return buf
+
+
+@pytest.mark.parametrize("container, codec, rate", [
+    ("webm", "libopus", 48000),
+    ("mp3", "libmp3lame", 44100),
+])
+def test_compressed_upload_decodes_to_one_second(container, codec, rate):
+    decoded = load_audio(encode_tone(container, codec, rate))
+
+    assert (decoded.sample_rate, decoded.sample_width) == (16000, 2)
+    # Tight on purpose: dropping the resampler flush loses 16 samples, and
+    # slicing whole (padded) planes instead of `samples` adds thousands
+    assert abs(len(decoded.frame_data) // 2 - 16000) < 8